@@ -1,16 +1,9 @@
 import sqlite3
-from passlib.context import CryptContext
 import argparse
 import os
 
-# --- Configuration ---
-DB_FILE = "users.db"
-
-# --- Hashing setup ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+from auth_utils import get_password_hash
+from db import DB_FILE, connect
 
 def add_user(username, password, role):
     """Adds a new user to the database."""
@@ -20,20 +13,22 @@ def add_user(username, password, role):
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         c = conn.cursor()
 
-        # Check if user already exists
-        c.execute("SELECT id FROM users WHERE username = ?", (username,))
-        if c.fetchone():
-            print(f"Error: User '{username}' already exists.")
-            return
-
+        # The duplicate check is part of the insert, so there is no window
+        # between the two. Names differing only in case count as duplicates
+        # even on databases that lack the NOCASE unique index.
         password_hash = get_password_hash(password)
         c.execute(
-            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, password_hash, role)
+            "INSERT INTO users (username, password_hash, role) "
+            "SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM users WHERE username = ? COLLATE NOCASE) "
+            "ON CONFLICT DO NOTHING RETURNING id",
+            (username, password_hash, role, username)
         )
+        if c.fetchone() is None:
+            print(f"Error: User '{username}' already exists.")
+            return
         conn.commit()
         print(f"User '{username}' with role '{role}' created successfully.")
 
@@ -1,175 +1,218 @@
+import asyncio
 import chainlit as cl
 import os
-from dotenv import load_dotenv
-import meilisearch
-from langdetect import detect
-from litellm import completion
-import sqlite3
-from passlib.context import CryptContext
-
-# --- Load Environment Variables ---
-load_dotenv()
-
-# --- Database and Auth Setup ---
-DB_FILE = "users.db"
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# --- Meilisearch Connection ---
-MEILI_URL = os.getenv("MEILI_URL")
-MEILI_API_KEY = os.getenv("MEILI_API_KEY")
-MEILI_INDEX_NAME = os.getenv("MEILI_INDEX_NAME", "documents")
-meili_client = meilisearch.Client(MEILI_URL, MEILI_API_KEY)
-meili_index = meili_client.index(MEILI_INDEX_NAME)
+import requests
+from cachetools import TTLCache
+from meilisearch.errors import MeilisearchError
+from config import LLM_MODEL, LLM_SYSTEM_PROMPT, SEARCH_CACHE_TTL
+from auth_utils import get_password_hash, verify_password, verify_password_cached, needs_rehash, get_user, change_password_in_db, warm_up
+from meili import search_hits
+from llm_cache import get_cached_answer, store_answer
+
+# --- Meilisearch Search Settings ---
+# Repeated lookups of the same term are answered from memory instead of going
+# back to Meilisearch.
+_search_cache = TTLCache(maxsize=2048, ttl=SEARCH_CACHE_TTL)
+
+# One-character queries match a large part of the index by prefix and are the
+# slowest searches Meilisearch can be asked for, so they are not sent at all.
+MIN_TERM_LENGTH = 2
+
+# Anything longer than MAX_TERM_LENGTH is pasted text, not a term, and is
+# refused outright so it never reaches Meilisearch or the LLM.
+MAX_TERM_LENGTH = 200
+
+_SEARCH_RESULT_HEADER = "**Din Baza de Cunoștințe:**\n\n"
 
 # --- LiteLLM (Gemini) Setup ---
-os.environ["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY")
-LLM_MODEL = os.getenv("LLM_MODEL", "gemini-pro")
-LLM_SYSTEM_PROMPT = os.getenv("LLM_SYSTEM_PROMPT", '''
-You are a professional translator and linguist. Your task is to translate the given term.
-1.  First, detect the source language of the term (between Romanian and English).
-2.  Translate it into the target language (if the source is Romanian, translate to English; if the source is English, translate to Romanian).
-3.  Provide multiple translation variants if they exist, especially if the term has different meanings in different contexts.
-4.  For each variant, provide a short, clear description or an example sentence to illustrate its usage.
-5.  Format the output clearly using Markdown. Use bullet points for each variant.
-''')
-
-# --- Password & User Helper Functions ---
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_user(username):
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = c.fetchone()
-    conn.close()
-    if user:
-        return dict(user)
-    return None
-
-def change_password_in_db(username, new_password_hash):
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("UPDATE users SET password_hash = ? WHERE username = ?", (new_password_hash, username))
-        conn.commit()
-        return True
-    except sqlite3.Error as e:
-        print(f"Database error on password change: {e}")
-        return False
-    finally:
-        if conn:
-            conn.close()
+_SYSTEM_MESSAGE = {"content": LLM_SYSTEM_PROMPT, "role": "system"}
+_AI_RESULT_HEADER = "**Rezultat de la AI:**\n\n"
+STREAM_FLUSH_INTERVAL = 0.05
+
+# litellm pulls in every provider SDK on import, so it is loaded on the first
+# AI request instead of at startup; login-only sessions never pay for it.
+_acompletion = None
+
+def _get_acompletion():
+    global _acompletion
+    if _acompletion is None:
+        from litellm import acompletion
+        _acompletion = acompletion
+    return _acompletion
 
 # --- Chainlit Authentication ---
+# The users database and the dummy hash are only needed when login is enabled.
 if "CHAINLIT_AUTH_SECRET" in os.environ:
+    # Opening the database (and switching it to WAL) happens here at startup
+    # rather than inside the first user's login.
+    warm_up()
+
+    # Unknown usernames are checked against this hash so that they take as long
+    # to reject as a wrong password and cannot be told apart by response time.
+    _DUMMY_HASH = get_password_hash("ksv-10-dummy-password")
+
+    # bcrypt work runs in worker threads: a check takes a few hundred
+    # milliseconds and would otherwise stall every other session while it runs.
     @cl.password_auth_callback
-    def auth_callback(username, password):
+    async def auth_callback(username, password):
         user = get_user(username)
         if not user:
+            await asyncio.to_thread(verify_password, password, _DUMMY_HASH)
             return None  # User not found
         
-        if not verify_password(password, user['password_hash']):
+        if not await asyncio.to_thread(verify_password_cached, password, user.password_hash):
             return None # Invalid password
+
+        # Bring hashes made with an older cost setting up to BCRYPT_ROUNDS
+        if needs_rehash(user.password_hash):
+            new_password_hash = await asyncio.to_thread(get_password_hash, password)
+            change_password_in_db(user.username, new_password_hash)
         
-        return cl.User(identifier=user['username'], role=user['role'])
+        return cl.User(identifier=user.username, role=user.role)
 
 
 @cl.on_chat_start
 async def on_chat_start():
     await cl.Message(content="Bun venit la KSV-10! Introduceți un termen pentru a începe.").send()
 
+# --- Command Handlers ---
+async def handle_change_password(msg_content):
+    # Three tokens are expected; splitting at most three times is enough to
+    # tell a valid command from one with extra tokens
+    parts = msg_content.split(None, 3)
+    if len(parts) != 3:
+        await cl.Message(content="Comandă invalidă. Folosiți: /schimba_parola <parola_veche> <parola_noua>").send()
+        return
+
+    _, old_password, new_password = parts
+    
+    try:
+        # Get the current user's identifier from the context
+        user_identifier = cl.context.session.user.identifier
+        # Fetch fresh user data directly from the database to be safe
+        user_db_data = get_user(user_identifier)
+    except Exception as e:
+        await cl.Message(content=f"Eroare: Nu am putut identifica utilizatorul curent: {e}").send()
+        return
+
+    if not user_db_data:
+        await cl.Message(content="Eroare: Utilizatorul nu a fost găsit în baza de date.").send()
+        return
+
+    # Verify old password using the data from the DB
+    if not await asyncio.to_thread(verify_password, old_password, user_db_data.password_hash):
+        await cl.Message(content="Parola veche este incorectă.").send()
+        return
+
+    # Change password
+    new_password_hash = await asyncio.to_thread(get_password_hash, new_password)
+    if change_password_in_db(user_db_data.username, new_password_hash):
+        await cl.Message(content="Parola a fost schimbată cu succes!").send()
+    else:
+        await cl.Message(content="A apărut o eroare la schimbarea parolei. Vă rugăm încercați mai târziu.").send()
+
+# Commands are looked up by their first token, so adding one does not add
+# another check to every dictionary lookup.
+COMMANDS = {
+    "/schimba_parola": handle_change_password,
+}
+
 @cl.on_message
 async def main(message: cl.Message):
     msg_content = message.content.strip()
     
     # --- Command Handling (Re-enabled) ---
-    if msg_content.startswith("/schimba_parola"):
-        parts = msg_content.split()
-        if len(parts) != 3:
-            await cl.Message(content="Comandă invalidă. Folosiți: /schimba_parola <parola_veche> <parola_noua>").send()
+    if msg_content[:1] == "/":
+        handler = COMMANDS.get(msg_content.split(None, 1)[0])
+        if handler:
+            await handler(msg_content)
             return
 
-        _, old_password, new_password = parts
-        
-        try:
-            # Get the current user's identifier from the context
-            user_identifier = cl.context.session.user.identifier
-            # Fetch fresh user data directly from the database to be safe
-            user_db_data = get_user(user_identifier)
-        except Exception as e:
-            await cl.Message(content=f"Eroare: Nu am putut identifica utilizatorul curent: {e}").send()
-            return
-
-        if not user_db_data:
-            await cl.Message(content="Eroare: Utilizatorul nu a fost găsit în baza de date.").send()
-            return
-
-        # Verify old password using the data from the DB
-        if not verify_password(old_password, user_db_data['password_hash']):
-            await cl.Message(content="Parola veche este incorectă.").send()
-            return
-
-        # Change password
-        new_password_hash = get_password_hash(new_password)
-        if change_password_in_db(user_db_data['username'], new_password_hash):
-            await cl.Message(content="Parola a fost schimbată cu succes!").send()
-        else:
-            await cl.Message(content="A apărut o eroare la schimbarea parolei. Vă rugăm încercați mai târziu.").send()
-        return
-
     # --- Dictionary Logic (if not a command) ---
     term = msg_content
     if not term:
         await cl.Message(content="Vă rog să introduceți un termen.").send()
         return
+    if len(term) < MIN_TERM_LENGTH:
+        await cl.Message(content=f"Vă rog să introduceți cel puțin {MIN_TERM_LENGTH} caractere.").send()
+        return
+    if len(term) > MAX_TERM_LENGTH:
+        await cl.Message(content=f"Termenul este prea lung (maxim {MAX_TERM_LENGTH} caractere).").send()
+        return
 
-    try:
-        search_results = meili_index.search(term)
-    except Exception as e:
-        print(f"AN ERROR OCCURRED DURING SEARCH: {e}")
-        search_results = {'hits': []} # Prevent crash
-
-    if search_results['hits']:
-        results_str = ""
-        for hit in search_results['hits']:
-            result_line = f"Rezultat: {hit.get('lang_a', '')} / {hit.get('lang_b', '')}"
-            source_line = f"Sursa: {hit.get('source', 'N/A')}"
-            results_str += f"{result_line}\n{source_line}\n\n"
-        
-        final_response = "**Din Baza de Cunoștințe:**\n\n" + results_str
-        
-        ask_llm_action = cl.Action(name="ask_llm", payload={"term": term}, label="Caută cu AI (LLM)")
+    cache_key = term.lower()
+    hits = _search_cache.get(cache_key)
+    if hits is None:
+        try:
+            hits = await search_hits(term)
+            _search_cache[cache_key] = hits
+        # The SDK wraps only timeouts, connection and HTTP status errors;
+        # broken or non-JSON responses surface as plain requests exceptions
+        except (MeilisearchError, requests.RequestException) as e:
+            print(f"AN ERROR OCCURRED DURING SEARCH: {e}")
+            hits = [] # Prevent crash
+
+    ask_llm_action = cl.Action(name="ask_llm", payload={"term": term}, label="Caută cu AI (LLM)")
+    if hits:
+        final_response = _SEARCH_RESULT_HEADER + "".join([
+            f"Rezultat: {hit.get('lang_a', '')} / {hit.get('lang_b', '')}\n"
+            f"Sursa: {hit.get('source', 'N/A')}\n\n"
+            for hit in hits
+        ])
         await cl.Message(content=final_response, actions=[ask_llm_action]).send()
     else:
         llm_button_message = f"Termenul **'{term}'** nu a fost găsit. Doriți să încerc cu AI?"
-        ask_llm_action = cl.Action(name="ask_llm", payload={"term": term}, label="Caută cu AI (LLM)")
         await cl.Message(content=llm_button_message, actions=[ask_llm_action]).send()
 
 @cl.action_callback("ask_llm")
 async def ask_llm(action: cl.Action):
     term = action.payload.get("term")
-    
-    # Send a "thinking" message
-    await cl.Message(content=f"Apelez la AI pentru '{term}'... 🧠").send()
 
-    # Get the response from the LLM and send it in a new, final message
+    llm_response = get_cached_answer(term)
+    if llm_response is not None:
+        await cl.Message(content=f"{_AI_RESULT_HEADER}{llm_response}").send()
+        return
+
+    # A single message carries the whole answer: it is sent straight away as
+    # the "working on it" signal, filled in as tokens arrive, and replaced by
+    # the error text if the call fails.
+    msg = cl.Message(content=_AI_RESULT_HEADER)
+    await msg.send()
+
     try:
-        response = completion(
+        acompletion = _get_acompletion()
+        response = await acompletion(
             model=LLM_MODEL,
             messages=[
-                {"content": LLM_SYSTEM_PROMPT, "role": "system"},
+                _SYSTEM_MESSAGE,
                 {"content": term, "role": "user"}
-            ]
+            ],
+            stream=True
         )
-        llm_response = response.choices[0].message.content
-        final_content = f"**Rezultat de la AI:**\n\n{llm_response}"
-        
-        await cl.Message(content=final_content).send()
+
+        # Tokens are forwarded in batches of up to STREAM_FLUSH_INTERVAL
+        # seconds rather than one websocket frame per token
+        loop = asyncio.get_running_loop()
+        tokens = []
+        pending = []
+        last_flush = loop.time()
+        async for chunk in response:
+            token = chunk.choices[0].delta.content
+            if token:
+                tokens.append(token)
+                pending.append(token)
+                if loop.time() - last_flush >= STREAM_FLUSH_INTERVAL:
+                    await msg.stream_token("".join(pending))
+                    pending.clear()
+                    last_flush = loop.time()
+        if pending:
+            await msg.stream_token("".join(pending))
+        await msg.update()
+
+        # An empty completion (e.g. a blocked answer) is not worth keeping
+        if tokens:
+            store_answer(term, "".join(tokens))
 
     except Exception as e:
-        await cl.Message(content=f"A apărut o eroare la contactarea serviciului AI: {e}").send()
\ No newline at end of file
+        msg.content = f"A apărut o eroare la contactarea serviciului AI: {e}"
+        await msg.update()
\ No newline at end of file
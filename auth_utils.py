@@ -0,0 +1,107 @@
+import hmac
+import secrets
+from collections import namedtuple
+import sqlite3
+import threading
+import bcrypt
+from cachetools import TTLCache
+from config import BCRYPT_ROUNDS
+from db import DB_FILE
+
+# Query strings are kept constant so sqlite3's statement cache reuses the
+# compiled statements instead of re-parsing them on every call.
+_SQL_GET_USER = "SELECT username, password_hash, role FROM users WHERE username = ?"
+_SQL_GET_USER_NOCASE = "SELECT username, password_hash, role FROM users WHERE username = ? COLLATE NOCASE LIMIT 2"
+_SQL_UPDATE_PASSWORD = "UPDATE users SET password_hash = ? WHERE username = ?"
+
+# The columns the app reads from a users row
+User = namedtuple("User", "username password_hash role")
+
+# --- Shared Connection ---
+# One connection is shared by all callers instead of reopening the database on
+# every login. sqlite3 connections are not safe for concurrent use, so every
+# access goes through _DB_LOCK. The connection is opened on first use so that
+# importing this module never creates users.db as a side effect.
+_conn = None
+_DB_LOCK = threading.Lock()
+
+def _get_connection():
+    """Returns the shared connection, opening it on first use. Call with _DB_LOCK held."""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None, cached_statements=128)
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+        ''')
+        _conn = conn
+    return _conn
+
+def warm_up():
+    """Opens the shared connection ahead of the first login."""
+    with _DB_LOCK:
+        _get_connection()
+
+# --- Password Hashing ---
+# bcrypt is called directly rather than through passlib's CryptContext: every
+# stored hash is bcrypt, so the scheme detection layer only adds overhead.
+def get_password_hash(password):
+    """Hashes the password."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def verify_password(plain_password, hashed_password):
+    """Checks a plain password against a stored hash."""
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def needs_rehash(hashed_password):
+    """True if the hash was made with a cost other than BCRYPT_ROUNDS."""
+    # bcrypt hashes look like $2b$<cost>$<salt+digest>
+    return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+
+# --- Verification Cache ---
+# Successful checks are remembered for a few minutes so that a user logging in
+# again (reconnects, new tabs) does not pay the full bcrypt cost each time.
+# Only successes are cached, so password guessing is not sped up. The key is
+# the stored hash plus an HMAC of the password under a per-process secret: no
+# plaintext is kept, and a password change invalidates old entries by itself.
+_verify_cache = TTLCache(maxsize=1024, ttl=300)
+_verify_cache_lock = threading.Lock()
+_VERIFY_CACHE_SECRET = secrets.token_bytes(32)
+
+def verify_password_cached(plain_password, hashed_password):
+    """Same as verify_password, but skips bcrypt for a recently verified password."""
+    key = (hashed_password, hmac.new(_VERIFY_CACHE_SECRET, plain_password.encode('utf-8'), 'sha256').digest())
+    with _verify_cache_lock:
+        if key in _verify_cache:
+            return True
+    if not verify_password(plain_password, hashed_password):
+        return False
+    with _verify_cache_lock:
+        _verify_cache[key] = True
+    return True
+
+# --- User Queries ---
+def get_user(username):
+    """Returns the user as a User tuple, or None if it does not exist."""
+    # The exact spelling always wins. Only without one is the name matched
+    # case-insensitively, and only if that is unambiguous: databases created
+    # before the NOCASE unique index may hold e.g. both "admin" and "Admin".
+    with _DB_LOCK:
+        conn = _get_connection()
+        row = conn.execute(_SQL_GET_USER, (username,)).fetchone()
+        if row is None:
+            rows = conn.execute(_SQL_GET_USER_NOCASE, (username,)).fetchall()
+            row = rows[0] if len(rows) == 1 else None
+    return User(*row) if row else None
+
+def change_password_in_db(username, new_password_hash):
+    """Stores a new password hash for the user. Returns True on success."""
+    try:
+        with _DB_LOCK:
+            _get_connection().execute(_SQL_UPDATE_PASSWORD, (new_password_hash, username))
+        return True
+    except sqlite3.Error as e:
+        print(f"Database error on password change: {e}")
+        return False
@@ -0,0 +1,42 @@
+import os
+from dotenv import load_dotenv
+
+# --- Load Environment Variables ---
+# All settings are read once here; the other modules import the constants.
+load_dotenv()
+
+# --- Passwords ---
+# bcrypt cost factor; each step doubles the time of a hash or a login check.
+# Stored hashes with a different cost are re-hashed on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# --- Meilisearch ---
+MEILI_URL = os.getenv("MEILI_URL")
+MEILI_API_KEY = os.getenv("MEILI_API_KEY")
+MEILI_INDEX_NAME = os.getenv("MEILI_INDEX_NAME", "documents")
+# Repeated lookups of the same term are answered from memory for this many
+# seconds. Dictionary content changes rarely, so the TTL can be long; lower it
+# if the index is updated often.
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "600"))
+# Searches arriving within this many seconds of each other share one request.
+SEARCH_BATCH_WINDOW = float(os.getenv("SEARCH_BATCH_WINDOW", "0.03"))
+# Load every document into memory at startup and answer exact headword
+# matches from there. Off by default: exact hits then skip Meilisearch's fuzzy
+# and prefix results, and each process holds a copy of the dictionary.
+MEILI_PRELOAD = os.getenv("MEILI_PRELOAD", "false").lower() == "true"
+
+# --- LiteLLM (Gemini) ---
+# litellm reads GEMINI_API_KEY from the environment by itself.
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-pro")
+LLM_SYSTEM_PROMPT = os.getenv("LLM_SYSTEM_PROMPT", '''
+You are a professional translator and linguist. Your task is to translate the given term.
+1.  First, detect the source language of the term (between Romanian and English).
+2.  Translate it into the target language (if the source is Romanian, translate to English; if the source is English, translate to Romanian).
+3.  Provide multiple translation variants if they exist, especially if the term has different meanings in different contexts.
+4.  For each variant, provide a short, clear description or an example sentence to illustrate its usage.
+5.  Format the output clearly using Markdown. Use bullet points for each variant.
+''')
+# LLM answers are cached per term in this SQLite file for LLM_CACHE_TTL
+# seconds, so they survive restarts.
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 60 * 60)))
@@ -1,25 +1,20 @@
 import sqlite3
-from passlib.context import CryptContext
-import os
+
+from auth_utils import get_password_hash
+from db import DB_FILE, connect
 
 # --- Configuration ---
-DB_FILE = "users.db"
 ADMIN_USERNAME = "admin"
 # WARNING: This is a default password. Change it in a secure way.
 ADMIN_PASSWORD = "admin"
 
-# --- Hashing setup ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password):
-    """Hashes the password."""
-    return pwd_context.hash(password)
-
-def create_database():
-    """Creates the database and the users table if they don't exist."""
+def create_database(conn):
+    """Creates the users table if it doesn't exist."""
     try:
-        conn = sqlite3.connect(DB_FILE)
         c = conn.cursor()
+        # WAL is stored in the database file, so setting it once here gives
+        # every later connection, the app's included, the same journal mode
+        c.execute("PRAGMA journal_mode=WAL")
         # Use IF NOT EXISTS to prevent errors on subsequent runs
         c.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -33,14 +28,26 @@ def create_database():
         print(f"Database '{DB_FILE}' and table 'users' are ready.")
     except sqlite3.Error as e:
         print(f"Database error during table creation: {e}")
-    finally:
-        if conn:
-            conn.close()
+        return
+
+    # Keeps usernames unique regardless of case and serves the case-insensitive
+    # login fallback. Older databases may already hold names that differ only
+    # in case; those must be renamed or deleted before the index can be built.
+    try:
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_nocase
+            ON users(username COLLATE NOCASE)
+        ''')
+        conn.commit()
+    except sqlite3.IntegrityError:
+        print("Warning: some usernames differ only in case, so the case-insensitive index was not created.")
+        print("Such users can only log in with the exact spelling of their username.")
+    except sqlite3.Error as e:
+        print(f"Database error during index creation: {e}")
 
-def add_admin_user():
+def add_admin_user(conn):
     """Adds the initial admin user to the database if they don't exist."""
     try:
-        conn = sqlite3.connect(DB_FILE)
         c = conn.cursor()
 
         # Check if the admin user already exists
@@ -49,7 +56,8 @@ def add_admin_user():
             print(f"Admin user '{ADMIN_USERNAME}' already exists. No action taken.")
             return
 
-        # If not, create the admin user
+        # If not, create the admin user. Hashing is only done here, on a miss,
+        # since it is the expensive step.
         password_hash = get_password_hash(ADMIN_PASSWORD)
         c.execute(
             "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
@@ -61,12 +69,14 @@ def add_admin_user():
 
     except sqlite3.Error as e:
         print(f"Database error during admin user creation: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 if __name__ == "__main__":
     print("--- Initializing User Database ---")
-    create_database()
-    add_admin_user()
+    # One connection serves both steps
+    conn = connect()
+    try:
+        create_database(conn)
+        add_admin_user(conn)
+    finally:
+        conn.close()
     print("--- Initialization Complete ---")
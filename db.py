@@ -0,0 +1,14 @@
+import sqlite3
+
+# --- Configuration ---
+# Kept apart from auth_utils so that the admin scripts can open the database
+# without loading bcrypt or the app's .env settings.
+DB_FILE = "users.db"
+
+def connect():
+    """Opens a connection for the admin scripts."""
+    conn = sqlite3.connect(DB_FILE)
+    # Per-connection setting; unlike journal_mode it writes nothing to the file,
+    # so read-only databases can still be listed.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -2,8 +2,7 @@ import sqlite3
 import argparse
 import os
 
-# --- Configuration ---
-DB_FILE = "users.db"
+from db import DB_FILE, connect
 
 def delete_user(username):
     """Deletes a user from the database."""
@@ -12,33 +11,26 @@ def delete_user(username):
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         c = conn.cursor()
 
-        # Check if the user exists before deleting
-        c.execute("SELECT id FROM users WHERE username = ?", (username,))
-        user = c.fetchone()
-        if not user:
-            print(f"Error: User '{username}' not found.")
-            return
-        
-        # Prevent deleting the last admin user
-        if username.lower() == 'admin':
-            c.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
-            admin_count = c.fetchone()[0]
-            if admin_count <= 1:
+        # Delete in one statement, refusing to remove the last admin. Only when
+        # nothing was deleted is a second query needed to explain why.
+        c.execute(
+            "DELETE FROM users WHERE username = ? "
+            "AND NOT (role = 'admin' AND (SELECT COUNT(*) FROM users WHERE role = 'admin') <= 1) "
+            "RETURNING id",
+            (username,)
+        )
+        if c.fetchone() is None:
+            c.execute("SELECT id FROM users WHERE username = ?", (username,))
+            if c.fetchone():
                 print("Error: Cannot delete the last admin user.")
-                return
-
-        c.execute("DELETE FROM users WHERE username = ?", (username,))
+            else:
+                print(f"Error: User '{username}' not found.")
+            return
         conn.commit()
-
-        # Verify deletion
-        c.execute("SELECT id FROM users WHERE username = ?", (username,))
-        if c.fetchone() is None:
-            print(f"User '{username}' deleted successfully.")
-        else:
-            print(f"Error: Failed to delete user '{username}'.")
+        print(f"User '{username}' deleted successfully.")
 
     except sqlite3.Error as e:
         print(f"Database error: {e}")
@@ -1,8 +1,12 @@
 import sqlite3
 import os
+import sys
 
-# --- Configuration ---
-DB_FILE = "users.db"
+from db import DB_FILE, connect
+
+# Rows are fetched and written this many at a time, so memory use stays flat
+# however many users there are.
+BATCH_SIZE = 1000
 
 def list_users():
     """Lists all users in the database."""
@@ -12,12 +16,12 @@ def list_users():
         return
 
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
 
         c.execute("SELECT id, username, role FROM users ORDER BY username")
-        users = c.fetchall()
+        users = c.fetchmany(BATCH_SIZE)
 
         if not users:
             print("No users found in the database.")
@@ -26,8 +30,11 @@ def list_users():
         print(f"--- Users in '{DB_FILE}' ---")
         print(f"{'ID':<5} {'Username':<25} {'Role':<10}")
         print("-" * 42)
-        for user in users:
-            print(f"{user['id']:<5} {user['username']:<25} {user['role']:<10}")
+        while users:
+            sys.stdout.write("".join(
+                f"{user['id']:<5} {user['username']:<25} {user['role']:<10}\n" for user in users
+            ))
+            users = c.fetchmany(BATCH_SIZE)
         print("-" * 42)
 
     except sqlite3.Error as e:
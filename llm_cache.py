@@ -0,0 +1,77 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from cachetools import TTLCache
+from config import LLM_CACHE_DB, LLM_CACHE_TTL, LLM_MODEL, LLM_SYSTEM_PROMPT
+
+# --- Exact-match LLM Answer Cache ---
+# Answers for a term already sent to the LLM are reused instead of paying for
+# another multi-second completion. Recent answers are kept in memory; all of
+# them are also written to SQLite so they survive restarts and are shared by
+# every process using the same file.
+
+# Empty answers written before they were refused by the app are skipped
+_SQL_GET = "SELECT value, ts FROM llm_cache WHERE key = ? AND ts >= ? AND value != ''"
+_SQL_PUT = "INSERT OR REPLACE INTO llm_cache (key, value, ts) VALUES (?, ?, ?)"
+
+# Entries are (answer, ts) pairs. An answer loaded from SQLite keeps the ts it
+# was stored with, so it expires when the row does rather than LLM_CACHE_TTL
+# after it was loaded.
+_memory_cache = TTLCache(maxsize=512, ttl=LLM_CACHE_TTL)
+
+_conn = None
+_DB_LOCK = threading.Lock()
+
+def _get_connection():
+    """Returns the cache connection, creating the table on first use. Call with _DB_LOCK held."""
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(LLM_CACHE_DB, check_same_thread=False, isolation_level=None)
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                ts INTEGER NOT NULL
+            );
+        ''')
+        # Drop answers that expired while the app was not running
+        conn.execute("DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - LLM_CACHE_TTL,))
+        _conn = conn
+    return _conn
+
+def _cache_key(term):
+    """Keys on the model, the prompt and the normalised term, so changing either setting starts afresh."""
+    raw = f"{LLM_MODEL}|{LLM_SYSTEM_PROMPT}|{term.strip().casefold()}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def get_cached_answer(term):
+    """Returns the cached LLM answer for term, or None."""
+    key = _cache_key(term)
+    oldest = int(time.time()) - LLM_CACHE_TTL
+    entry = _memory_cache.get(key)
+    if entry is not None and entry[1] >= oldest:
+        return entry[0]
+    try:
+        with _DB_LOCK:
+            row = _get_connection().execute(_SQL_GET, (key, oldest)).fetchone()
+    except sqlite3.Error as e:
+        print(f"LLM cache read error: {e}")
+        return None
+    if row:
+        _memory_cache[key] = row
+        return row[0]
+    return None
+
+def store_answer(term, answer):
+    """Caches the LLM answer for term."""
+    key = _cache_key(term)
+    ts = int(time.time())
+    _memory_cache[key] = (answer, ts)
+    try:
+        with _DB_LOCK:
+            _get_connection().execute(_SQL_PUT, (key, answer, ts))
+    except sqlite3.Error as e:
+        print(f"LLM cache write error: {e}")
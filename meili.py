@@ -0,0 +1,171 @@
+import asyncio
+import meilisearch
+from meilisearch._httprequests import HttpRequests
+from meilisearch.config import Config
+from meilisearch.errors import MeilisearchError
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import MEILI_URL, MEILI_API_KEY, MEILI_INDEX_NAME, MEILI_PRELOAD, SEARCH_BATCH_WINDOW
+
+# --- Keep-alive Session ---
+# The SDK issues every call through the module-level requests.get/post, which
+# opens a new connection per search. Route its calls through one pooled
+# session instead so the connection to Meilisearch is kept alive.
+# The pool holds as many connections as asyncio.to_thread has worker threads
+# (32 at most), so concurrent batches never open throwaway connections. urllib3
+# already sets TCP_NODELAY on every socket.
+MEILI_POOL_SIZE = 32
+
+_meili_session = requests.Session()
+_meili_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MEILI_POOL_SIZE, max_retries=1)
+_meili_session.mount("http://", _meili_adapter)
+_meili_session.mount("https://", _meili_adapter)
+
+# This relies on an SDK internal: HttpRequests.send_request receives the
+# requests.get/post/... function to call. requirements.txt pins the SDK version
+# this was written against, and _check_meili_session() fails at startup if the
+# calls stop going through the session instead of silently bypassing it.
+def _use_meili_session(http):
+    send_request = http.send_request
+    def send_request_with_session(http_method, *args, **kwargs):
+        return send_request(getattr(_meili_session, http_method.__name__), *args, **kwargs)
+    http.send_request = send_request_with_session
+
+class _SessionReached(Exception):
+    pass
+
+def _check_meili_session():
+    """Raises RuntimeError unless a patched client sends GET and POST through _meili_session."""
+    # A throwaway client pointed at a closed local port: if the patch were
+    # bypassed the calls would fail to connect instead of reaching a server.
+    http = HttpRequests(Config("http://127.0.0.1:9", timeout=1))
+    _use_meili_session(http)
+    seen = []
+    def record(method, *args, **kwargs):
+        seen.append(method)
+        raise _SessionReached
+    _meili_session.request = record
+    try:
+        for call in (http.get, http.post):
+            try:
+                call("health")
+            except (_SessionReached, MeilisearchError):
+                pass
+    finally:
+        del _meili_session.request
+    if seen != ["GET", "POST"]:
+        raise RuntimeError("The installed meilisearch SDK no longer routes requests through the shared session; check the pinned version in requirements.txt.")
+
+_check_meili_session()
+
+# --- Client ---
+meili_client = meilisearch.Client(MEILI_URL, MEILI_API_KEY)
+meili_index = meili_client.index(MEILI_INDEX_NAME)
+_use_meili_session(meili_client.http)
+_use_meili_session(meili_index.http)
+
+# Only these fields are rendered, so searches and the preload ask Meilisearch
+# for nothing else; any other stored fields never cross the wire.
+_HIT_FIELDS = ["lang_a", "lang_b", "source"]
+
+# --- In-memory Exact-match Index ---
+# With MEILI_PRELOAD enabled every document is fetched once at startup and
+# indexed by its lowercased lang_a and lang_b values. A term that is exactly a
+# headword is answered from memory; anything else still goes to Meilisearch.
+_PRELOAD_PAGE_SIZE = 10000
+_exact_index = {}
+
+def _load_exact_index():
+    """Fills _exact_index with every document in the Meilisearch index."""
+    offset = 0
+    while True:
+        page = meili_index.get_documents({
+            "limit": _PRELOAD_PAGE_SIZE,
+            "offset": offset,
+            "fields": _HIT_FIELDS,
+        })
+        for document in page.results:
+            hit = dict(document)
+            headwords = {str(hit[field]).strip().lower() for field in ("lang_a", "lang_b") if hit.get(field)}
+            for headword in headwords:
+                _exact_index.setdefault(headword, []).append(hit)
+        if len(page.results) < _PRELOAD_PAGE_SIZE:
+            break
+        offset += _PRELOAD_PAGE_SIZE
+    print(f"Loaded {len(_exact_index)} headwords from Meilisearch index '{MEILI_INDEX_NAME}'.")
+
+if MEILI_PRELOAD:
+    try:
+        _load_exact_index()
+    # Besides the SDK's own errors, a non-JSON or truncated response surfaces
+    # as a requests exception and an empty body as a TypeError
+    except (MeilisearchError, requests.RequestException, TypeError) as e:
+        _exact_index.clear()
+        print(f"Could not preload the Meilisearch index, searching over HTTP only: {e}")
+
+# --- Batched Searches ---
+# Searches that arrive within SEARCH_BATCH_WINDOW seconds of each other are
+# sent together through the multi-search endpoint, so concurrent users share
+# one HTTP round-trip. A lone search is sent on its own once the window ends.
+# The same term searched by several users at once is sent only once.
+SEARCH_BATCH_MAX = 16
+
+_pending_searches = []
+_in_flight = {}
+_flush_timer = None
+_batch_tasks = set()
+
+async def search_hits(term):
+    """Returns the Meilisearch hits for term, batching it with concurrent searches."""
+    global _flush_timer
+    key = term.lower()
+    hits = _exact_index.get(key)
+    if hits:
+        return hits
+
+    # Identical searches already on their way share the pending result. The
+    # shield keeps one caller's cancellation from cancelling it for the rest.
+    future = _in_flight.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+        _pending_searches.append((term, future))
+        if len(_pending_searches) >= SEARCH_BATCH_MAX:
+            _start_batch()
+        elif _flush_timer is None:
+            _flush_timer = loop.call_later(SEARCH_BATCH_WINDOW, _start_batch)
+    return await asyncio.shield(future)
+
+def _start_batch():
+    global _pending_searches, _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    batch, _pending_searches = _pending_searches, []
+    task = asyncio.get_running_loop().create_task(_run_batch(batch))
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+
+async def _run_batch(batch):
+    try:
+        if len(batch) == 1:
+            search_params = {"attributesToRetrieve": _HIT_FIELDS}
+            results = [await asyncio.to_thread(meili_index.search, batch[0][0], search_params)]
+        else:
+            queries = [
+                {"indexUid": MEILI_INDEX_NAME, "q": term, "attributesToRetrieve": _HIT_FIELDS}
+                for term, _ in batch
+            ]
+            response = await asyncio.to_thread(meili_client.multi_search, queries)
+            results = response['results']
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    for (_, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result['hits'])